@@ -0,0 +1,87 @@
+#============================================ Comment Loading Benchmark ===============================================================#
+
+# Compares the ways of loading comment_data in to MySQL on a synthetic data set:
+#   to_sql      -> the old path, one DataFrame of every row and a single DataFrame.to_sql
+#   upsert      -> upsert_sql_rows, chunked INSERT ... ON DUPLICATE KEY UPDATE
+#   load_data   -> bulk_load_sql_rows, LOAD DATA LOCAL INFILE (needs SQL_BULK_LOAD=1 and local_infile=ON on the server)
+#
+# Usage: python benchmark.py [number_of_comments]   (default 2,000,000)
+# Rows are loaded in to a scratch table "comment_data_benchmark", which is dropped afterwards.
+
+import sys
+import time
+from datetime import datetime
+import pandas as pd
+from sqlalchemy import text
+import main
+
+table = "comment_data_benchmark"
+columns = main.sql_table_sources["comment_data"]["columns"]
+
+# Comment texts with the characters the TSV staging file has to escape
+sample_texts = ["Great video!", "line one\nline two", "tab\tseparated", "back\\slash \\N not null",
+                "emoji 😀🔥 and ünïcödé", "carriage\r\nreturn", "", None]
+
+def synthetic_comments(n):
+    for i in range(n):
+        yield dict(Channel_ID=f"UC{i % 300:022d}",
+                   Comment_ID=f"Ug{i:024d}",
+                   Video_ID=f"v{i % 20000:010d}",
+                   Comment_Text=sample_texts[i % len(sample_texts)],
+                   Comment_Author=f"@author{i % 50000}",
+                   Comment_Published_Date=datetime(2023, 5, 1, 12, 0, 0))
+
+#----------------------------------------------------------------------------------------------------------------------#
+
+def reset_table():
+    main.create_sql_tables()
+    with main.engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text(f"CREATE TABLE {table} LIKE comment_data"))
+
+def load_to_sql(n):
+    df = pd.DataFrame(synthetic_comments(n))
+    df.to_sql(table, con=main.engine, if_exists="append", index=False)
+
+def load_upsert(n):
+    with main.engine.begin() as conn:
+        main.upsert_sql_rows(conn, table, columns, synthetic_comments(n))
+
+def load_data_infile(n):
+    with main.engine.begin() as conn:
+        if main.bulk_load_sql_rows(conn, table, columns, synthetic_comments(n)) is None:
+            raise RuntimeError("LOAD DATA LOCAL INFILE is not allowed on this server")
+
+# Checking that the escaped texts come back exactly as they were written
+def check_round_trip():
+    with main.engine.connect() as conn:
+        stored = conn.execute(text(f"SELECT Comment_Text FROM {table} ORDER BY Comment_ID LIMIT :n"),
+                              {"n": len(sample_texts)}).scalars().all()
+    return stored == sample_texts
+
+#----------------------------------------------------------------------------------------------------------------------#
+
+def run(n):
+    results = []
+    for name, load in [("to_sql", load_to_sql), ("upsert", load_upsert), ("load_data", load_data_infile)]:
+        reset_table()
+        started = time.perf_counter()
+        try:
+            load(n)
+        except Exception as e:
+            print(f"{name}: skipped ({e})")
+            continue
+        elapsed = time.perf_counter() - started
+        results.append(dict(method=name, rows=n, seconds=round(elapsed, 1), rows_per_sec=round(n / elapsed),
+                            round_trip_ok=check_round_trip()))
+        print(results[-1])
+
+    with main.engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+    print(pd.DataFrame(results).to_string(index=False))
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
+
+#======================================================== THE END  =======================================================================================#
@@ -0,0 +1,185 @@
+#============================================ End-to-End Harvest Benchmark ===========================================================#
+
+# Runs the whole pipeline offline and measures every stage. The YouTube API is replaced by yt_api_simulator, MongoDB by
+# mongomock and the MySQL warehouse by a SQLite file, so no API key, Atlas cluster or MySQL server is needed.
+#   harvest   -> batch_channel_data_to_mongodb on every simulated channel (they are all new, so they are scraped)
+#   refresh   -> new uploads and more views on the simulator, then an incremental refresh of every channel
+#   transfer  -> sql_tables(full_refresh=True) in to the SQLite warehouse
+#   analyze   -> every Analyze Data query
+# For every stage it prints the wall time, API calls, quota units, rows written, rows/sec and peak RSS, and at the end
+# the space the comments take in Mongo (BSON bytes, mongomock has no collStats) and in the SQLite warehouse.
+#
+# Usage: python harvest_benchmark.py [--channels 2] [--videos 200] [--comments 30] [--replies 0] [--latency 0.02]
+#                                    [--error-rate 0] [--comments-disabled 0.05] [--duplicate-comments 0.3]
+#                                    [--authors 2000] [--json results.json]
+# mongomock has to be installed (pip install mongomock), it isn't needed by the app itself. mongomock upserts scan the
+# whole collection, so beyond a few thousand documents the harvest and refresh times mostly measure mongomock: compare
+# runs of the same size. API calls, quota units and the SQL stages are not affected.
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from unittest import mock
+import bson
+import pandas as pd
+
+try:
+    import mongomock
+except ImportError:
+    sys.exit("The harvest benchmark needs mongomock: pip install mongomock")
+
+import yt_api_simulator
+
+#----------------------------------------------------------------------------------------------------------------------#
+
+# Peak resident memory of this process in MB. On Linux the peak is reset before each stage (clear_refs 5), elsewhere
+# it is the peak since the process started.
+def reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+# Running one stage, which returns the number of rows it wrote
+def measure(name, stage, api, main):
+    reset_peak_rss()
+    calls_before = api.stats()["calls"]
+    quota_before = main.api_scheduler.metrics()["quota_used"]
+    started = time.perf_counter()
+    rows = stage()
+    seconds = time.perf_counter() - started
+    result = dict(stage=name, seconds=round(seconds, 2), api_calls=api.stats()["calls"] - calls_before,
+                  quota_units=main.api_scheduler.metrics()["quota_used"] - quota_before, rows=rows,
+                  rows_per_sec=round(rows / seconds) if seconds else None, peak_rss_mb=peak_rss_mb())
+    print(result)
+    return result
+
+# Comment storage: BSON bytes of the comments collection and dbstat bytes of the SQL comment table
+def comment_storage(main):
+    storage = [dict(store="mongo", name=main.comments_collection.name, rows=main.comments_collection.count_documents({}),
+                    data_bytes=sum(len(bson.encode(document)) for document in main.comments_collection.find()))]
+    storage += [dict(store="sql", name=table["name"], rows=table["rows"], data_bytes=table["data_bytes"],
+                     index_bytes=table["index_bytes"])
+                for table in main.sql_table_sizes(["comment_data"])]
+    return storage
+
+#----------------------------------------------------------------------------------------------------------------------#
+
+def run(args):
+    work_dir = tempfile.mkdtemp(prefix="harvest_benchmark_")
+
+    # Settings are read by main.py when it is imported, environment variables win over the .env file
+    os.environ.update(SQL_URL=f"sqlite:///{os.path.join(work_dir, 'warehouse.sqlite3')}",
+                      QUERY_CACHE_PATH=os.path.join(work_dir, "query_cache.sqlite3"),
+                      PARQUET_PATH=os.path.join(work_dir, "lake"),
+                      QUERY_CACHE_PREWARM="0",
+                      RESPONSE_CACHE="0",
+                      STATS_HISTORY="0", # mongomock has no time-series collections
+                      SQL_BULK_LOAD="0",
+                      MONGO_BLOCK_COMPRESSOR="", # mongomock can't create collections with storage engine options
+                      HARVEST_REPLIES="1" if args.replies else "0",
+                      API_REQUESTS_PER_SECOND=str(args.rps),
+                      API_BURST=str(args.rps),
+                      API_MAX_BACKOFF="1",
+                      DAILY_QUOTA_UNITS=str(10**9))
+    if args.comment_workers:
+        os.environ["COMMENT_WORKERS"] = str(args.comment_workers)
+
+    with mock.patch("pymongo.MongoClient", lambda *args, **kwargs: mongomock.MongoClient()):
+        import main
+
+    api = yt_api_simulator.SimulatedYouTube(channels=args.channels, videos_per_channel=args.videos,
+                                            comments_per_video=args.comments, replies_per_comment=args.replies,
+                                            comments_disabled_rate=args.comments_disabled,
+                                            duplicate_comment_rate=args.duplicate_comments, authors=args.authors, latency=args.latency,
+                                            error_rate=args.error_rate, seed=args.seed)
+    main.youtube = api
+
+    def documents_written_since(started):
+        return sum(collection.count_documents({"Last_Updated": {"$gte": started}})
+                   for collection in (main.channels_collection, main.videos_collection, main.comments_collection))
+
+    def harvest():
+        started = datetime.now(timezone.utc)
+        results = main.batch_channel_data_to_mongodb(api.channel_ids)
+        failed = [result for result in results if result["Status"] == "Failed"]
+        if failed:
+            raise RuntimeError(f"Harvest failed: {failed}")
+        return documents_written_since(started)
+
+    def refresh():
+        api.upload(args.new_videos)
+        api.advance()
+        started = datetime.now(timezone.utc)
+        for channel_id in api.channel_ids:
+            main.update_channel_data_to_mongodb(channel_id)
+        return documents_written_since(started)
+
+    def transfer():
+        main.sql_tables(full_refresh=True)
+        with main.engine.connect() as conn:
+            return sum(conn.execute(main.text(f"SELECT COUNT(*) FROM {table}")).scalar()
+                       for table in ("channel_details", "video_details", "comment_data"))
+
+    def analyze():
+        return sum(len(main.run_analysis_query(query)[0]) for query in main.analysis_queries.values())
+
+    results = [measure(name, stage, api, main)
+               for name, stage in [("harvest", harvest), ("refresh", refresh), ("transfer", transfer), ("analyze", analyze)]]
+
+    print()
+    print(f"{args.channels} channels x {args.videos} videos x ~{args.comments} comments, "
+          f"{args.latency * 1000:.0f} ms latency, {args.error_rate:.0%} errors")
+    print(pd.DataFrame(results).to_string(index=False))
+    print("Simulator:", api.stats())
+    print("Scheduler:", main.api_scheduler.metrics())
+    print()
+    print(pd.DataFrame(main.pipeline_metrics.snapshot()).to_string(index=False))
+    print()
+    storage = comment_storage(main)
+    print("Comment storage:")
+    print(pd.DataFrame(storage).to_string(index=False))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as results_file:
+            json.dump(dict(settings=vars(args), stages=results, simulator=api.stats(), comment_storage=storage), results_file, indent=2)
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end harvest benchmark")
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--videos", type=int, default=200, help="Videos per channel")
+    parser.add_argument("--comments", type=int, default=30, help="Average top level comments per video")
+    parser.add_argument("--replies", type=int, default=0, help="Replies of every 10th comment, harvested when > 0")
+    parser.add_argument("--comments-disabled", type=float, default=0.05, help="Share of videos with comments disabled")
+    parser.add_argument("--duplicate-comments", type=float, default=0.3, help="Share of comments repeating a common text")
+    parser.add_argument("--authors", type=int, default=2000, help="Distinct comment authors")
+    parser.add_argument("--new-videos", type=int, default=5, help="Uploads per channel before the refresh stage")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds per simulated API call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of API calls failing with a transient error")
+    parser.add_argument("--rps", type=float, default=1000, help="API_REQUESTS_PER_SECOND for the scheduler")
+    parser.add_argument("--comment-workers", type=int, help="COMMENT_WORKERS, the .env value by default")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    run(parse_args())
+
+#======================================================== THE END  =======================================================================================#
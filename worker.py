@@ -0,0 +1,161 @@
+#============================================ Headless Worker & Command Line ==========================================================#
+
+# Runs the harvesting and SQL transfer work outside of Streamlit, reusing the functions in main.py.
+#
+#   python worker.py harvest UC... [UC...] [--file channels.txt]   scrape new / refresh stored channels now
+#   python worker.py refresh UC... | --all [--full]                 refresh stored channels now
+#   python worker.py transfer [--full-refresh]                      Mongo -> MySQL transfer now
+#   python worker.py export [--full]                                bring the Parquet lake up to date with the SQL tables
+#   python worker.py migrate                                        copy old yt_data_hub documents to the new collections and
+#                                                                   convert documents stored with string counters/dates
+#   python worker.py storage                                        space taken by the comments in Mongo and SQL
+#   python worker.py requeue JOB_ID                                 queue a failed job again, it resumes from its checkpoints
+#   python worker.py metrics [--jobs N]                             stage breakdown of the last N jobs as JSON lines
+#   python worker.py work [--refresh-every MIN] [--transfer-every MIN]
+#                                                                   daemon: runs the jobs submitted from the app and,
+#                                                                   optionally, refreshes all channels / transfers on a schedule
+#
+# For cron, "harvest", "refresh" and "transfer" can be called directly, they exit when the work is done.
+
+import argparse
+import json
+import socket
+import time
+from bson import ObjectId
+import main
+
+#----------------------------------------------------------------------------------------------------------------------#
+
+def harvest(args):
+    channel_ids = list(args.channel_ids)
+    if args.file:
+        with open(args.file, encoding="utf-8") as channel_list_file:
+            channel_ids += main.read_channel_ids(channel_list_file.read())
+    channel_ids = list(dict.fromkeys(channel_ids))
+
+    if len(channel_ids) == 1:
+        print(main.harvest_channel(channel_ids[0]))
+    else:
+        results = main.batch_channel_data_to_mongodb(channel_ids)
+        failed = [result for result in results if result["Status"] == "Failed"]
+        print(f"{len(results) - len(failed)} channels harvested, {len(failed)} failed")
+        return 1 if failed else 0
+    return 0
+
+def refresh(args):
+    channel_ids = main.channels_collection.distinct("_id") if args.all else args.channel_ids
+    for channel_id in channel_ids:
+        print(channel_id, main.update_channel_data_to_mongodb(channel_id, incremental=not args.full))
+    return 0
+
+def transfer(args):
+    print(main.sql_tables(args.full_refresh))
+    return 0
+
+def export(args):
+    main.parquet_tables(args.full)
+    return 0
+
+def migrate(args):
+    print(main.migrate_yt_data_hub())
+    print(f"{main.normalize_stored_documents()} stored documents converted to native types")
+    return 0
+
+def storage(args):
+    print(main.pd.DataFrame(main.comment_storage_stats()).to_string(index=False))
+    return 0
+
+def requeue(args):
+    if not main.requeue_job(ObjectId(args.job_id)):
+        print(f"Job {args.job_id} not found or not failed")
+        return 1
+    print(f"Job {args.job_id} queued again")
+    return 0
+
+def metrics(args):
+    for stage in main.recent_job_stages(args.jobs):
+        print(json.dumps(stage))
+    return 0
+
+#----------------------------------------------------------------------------------------------------------------------#
+
+# Worker loop: runs queued jobs one after another and, when asked, submits a refresh of every stored channel and
+# a SQL transfer every N minutes. Several workers can run side by side, each job is claimed by one of them only.
+def work(args):
+    worker_name = f"{socket.gethostname()}:{time.time():.0f}"
+    next_refresh = time.time() if args.refresh_every else None
+    next_transfer = time.time() if args.transfer_every else None
+    print(f"Worker {worker_name} started")
+
+    while True:
+        if next_refresh and time.time() >= next_refresh:
+            for channel_id in main.channels_collection.distinct("_id"):
+                main.submit_job("refresh", channel_id=channel_id)
+            next_refresh += args.refresh_every * 60
+        if next_transfer and time.time() >= next_transfer:
+            main.submit_job("transfer", full_refresh=False)
+            next_transfer += args.transfer_every * 60
+
+        job = main.claim_next_job(worker_name)
+        if job is None:
+            time.sleep(args.poll_interval)
+            continue
+        main.run_job(job)
+
+#----------------------------------------------------------------------------------------------------------------------#
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="YouTube data harvesting worker")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    harvest_parser = commands.add_parser("harvest", help="Scrape new channels and refresh stored ones")
+    harvest_parser.add_argument("channel_ids", nargs="*")
+    harvest_parser.add_argument("--file", help="File with channel IDs, one per line")
+    harvest_parser.set_defaults(run=harvest)
+
+    refresh_parser = commands.add_parser("refresh", help="Refresh stored channels")
+    refresh_parser.add_argument("channel_ids", nargs="*")
+    refresh_parser.add_argument("--all", action="store_true", help="Refresh every stored channel")
+    refresh_parser.add_argument("--full", action="store_true", help="Fetch everything again instead of only what changed")
+    refresh_parser.set_defaults(run=refresh)
+
+    transfer_parser = commands.add_parser("transfer", help="Transfer the data from MongoDB to MySQL")
+    transfer_parser.add_argument("--full-refresh", action="store_true", help="Send every row, not only the changed ones")
+    transfer_parser.set_defaults(run=transfer)
+
+    export_parser = commands.add_parser("export", help="Write the channels changed since the last export to the Parquet lake")
+    export_parser.add_argument("--full", action="store_true", help="Write the whole lake again")
+    export_parser.set_defaults(run=export)
+
+    migrate_parser = commands.add_parser("migrate", help="Copy the old yt_data_hub documents to the new collections, convert old documents to native types")
+    migrate_parser.set_defaults(run=migrate)
+
+    storage_parser = commands.add_parser("storage", help="Print the space taken by the comments in Mongo and SQL")
+    storage_parser.set_defaults(run=storage)
+
+    requeue_parser = commands.add_parser("requeue", help="Queue a failed job again, it resumes where it stopped")
+    requeue_parser.add_argument("job_id")
+    requeue_parser.set_defaults(run=requeue)
+
+    metrics_parser = commands.add_parser("metrics", help="Print the stage breakdown of the last jobs as JSON lines")
+    metrics_parser.add_argument("--jobs", type=int, default=10, help="Number of jobs")
+    metrics_parser.set_defaults(run=metrics)
+
+    work_parser = commands.add_parser("work", help="Run the jobs submitted from the Streamlit app")
+    work_parser.add_argument("--poll-interval", type=float, default=5, help="Seconds to wait when no job is queued")
+    work_parser.add_argument("--refresh-every", type=float, help="Minutes between refreshes of every stored channel")
+    work_parser.add_argument("--transfer-every", type=float, help="Minutes between SQL transfers")
+    work_parser.set_defaults(run=work)
+
+    args = parser.parse_args(argv)
+    if args.command == "harvest" and not (args.channel_ids or args.file):
+        parser.error("give channel IDs or --file")
+    if args.command == "refresh" and not (args.channel_ids or args.all):
+        parser.error("give channel IDs or --all")
+    return args
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    raise SystemExit(arguments.run(arguments))
+
+#======================================================== THE END  =======================================================================================#
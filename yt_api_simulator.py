@@ -0,0 +1,315 @@
+#============================================ Offline YouTube API Simulator ===========================================================#
+
+# A local stand-in for the parts of the YouTube Data API v3 that main.py uses: channels, playlistItems, videos,
+# commentThreads and comments list calls. It is used in place of main.youtube:
+#
+#   import yt_api_simulator
+#   api = yt_api_simulator.SimulatedYouTube(channels=3, videos_per_channel=500, comments_per_video=40, latency=0.05)
+#   main.youtube = api
+#   main.channel_data_to_mongodb(api.channel_ids[0])
+#
+# Videos, comments and replies are generated on the fly from their numbers (only the video ID index is kept), so a
+# channel with a million comments costs no memory. Page tokens, etags (If-None-Match -> 304), commentsDisabled 403s, reply threads
+# and the daily quota (quotaExceeded 403s) behave like the real API. Latency and transient errors (500, 503,
+# rateLimitExceeded) can be injected. The "fields" parameter is accepted but the full resources are returned.
+
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+import httplib2
+from googleapiclient.errors import HttpError
+
+# Quota cost of each simulated call, same as the real API
+quota_costs = {"channels": 1, "playlistItems": 1, "videos": 1, "commentThreads": 1, "comments": 1}
+
+# Transient errors picked at random when error_rate > 0: (status, reason)
+injected_errors = [(500, "backendError"), (503, "backendError"), (403, "rateLimitExceeded")]
+
+# Texts repeated word for word across videos, picked for duplicate_comment_rate of the comments
+common_comment_texts = ["First!", "Great video!", "\N{HEAVY BLACK HEART}\N{HEAVY BLACK HEART}\N{HEAVY BLACK HEART}", "Who's watching in 2024?",
+                        "Thanks for sharing", "Check out my channel for free giveaways \N{FIRE}\N{FIRE}",
+                        "Nice", "Awesome content, keep it up!"]
+
+#----------------------------------------------------------------------------------------------------------------------#
+
+# One list() call. Looks like googleapiclient's HttpRequest to main.py: methodId, uri, headers, postproc and execute().
+class SimulatedRequest:
+
+    def __init__(self, api, resource, params):
+        self.api = api
+        self.resource = resource
+        self.params = {name: value for name, value in params.items() if value is not None}
+        self.methodId = f"youtube.{resource}.list"
+        self.uri = f"https://youtube.googleapis.com/youtube/v3/{resource}?{urlencode({**self.params, 'key': 'simulated'})}"
+        self.headers = {}
+        self.postproc = lambda resp, content: json.loads(content)
+
+    def execute(self, http=None, num_retries=0):
+        return self.api.execute(self)
+
+class SimulatedResource:
+
+    def __init__(self, api, resource):
+        self.api = api
+        self.resource = resource
+
+    def list(self, **params):
+        return SimulatedRequest(self.api, self.resource, params)
+
+#----------------------------------------------------------------------------------------------------------------------#
+
+# channels                -> number of synthetic channels, their IDs are in .channel_ids
+# videos_per_channel      -> uploads of every channel
+# comments_per_video      -> average top level comments per video (each video gets between half and 1.5 times this)
+# replies_per_comment     -> replies of every 10th top level comment, the others have none
+# comments_disabled_rate  -> share of videos whose commentThreads call answers 403 commentsDisabled
+# duplicate_comment_rate  -> share of top level comments that repeat one of a few common texts ("First!", spam)
+# authors                 -> number of distinct comment authors the comments are spread over
+# latency                 -> seconds every call takes (plus up to 20% jitter)
+# error_rate              -> share of calls that fail with a transient error
+# daily_quota             -> units after which every call answers 403 quotaExceeded (None = unlimited)
+class SimulatedYouTube:
+
+    def __init__(self, channels=1, videos_per_channel=100, comments_per_video=20, replies_per_comment=0,
+                 comments_disabled_rate=0.0, duplicate_comment_rate=0.0, authors=50000, latency=0.0, error_rate=0.0,
+                 daily_quota=None, seed=0):
+        self.videos_per_channel = videos_per_channel
+        self.comments_per_video = comments_per_video
+        self.replies_per_comment = replies_per_comment
+        self.comments_disabled_rate = comments_disabled_rate
+        self.duplicate_comment_rate = duplicate_comment_rate
+        self.authors = authors
+        self.latency = latency
+        self.error_rate = error_rate
+        self.daily_quota = daily_quota
+        self.seed = seed
+        self.channel_ids = [self.make_id("UC", 22, "channel", i) for i in range(channels)]
+        self.channel_index = {channel_id: i for i, channel_id in enumerate(self.channel_ids)}
+        self.new_videos = Counter() # Videos uploaded after the start, per channel index, see upload()
+        self.reply_parents = {} # Comment ID -> (channel, video number, comment number) of the threads that have replies
+        self.view_boost = 0 # Added to every view count, see advance()
+        self.calls = Counter()
+        self.errors = Counter()
+        self.quota_used = 0
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.video_lookup = {self.video_id(channel, n): (channel, n)
+                             for channel in range(channels) for n in range(videos_per_channel)}
+
+    # Deterministic IDs in the YouTube alphabet
+    def make_id(self, prefix, length, *parts):
+        digest = hashlib.sha1(f"{self.seed}:{':'.join(map(str, parts))}".encode()).digest()
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+        return prefix + "".join(alphabet[byte % 64] for byte in (digest * 2)[:length])
+
+    def number(self, *parts, low=0, high=1000):
+        digest = hashlib.sha1(f"{self.seed}:{':'.join(map(str, parts))}".encode()).digest()
+        return low + int.from_bytes(digest[:4], "big") % (high - low + 1)
+
+    def timestamp(self, days_before_start):
+        return (self.started - timedelta(days=days_before_start)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    #------------------------------------------------------------------------------------------------------------------#
+
+    def channels(self):
+        return SimulatedResource(self, "channels")
+
+    def playlistItems(self):
+        return SimulatedResource(self, "playlistItems")
+
+    def videos(self):
+        return SimulatedResource(self, "videos")
+
+    def commentThreads(self):
+        return SimulatedResource(self, "commentThreads")
+
+    def comments(self):
+        return SimulatedResource(self, "comments")
+
+    # Changes between two harvests: "count" new uploads on every channel, and more views on every video
+    def upload(self, count=1):
+        for channel in range(len(self.channel_ids)):
+            for n in range(self.video_count(channel), self.video_count(channel) + count):
+                self.video_lookup[self.video_id(channel, n)] = (channel, n)
+            self.new_videos[channel] += count
+
+    def advance(self, views=100):
+        self.view_boost += views
+
+    #------------------------------------------------------------------------------------------------------------------#
+
+    # Video number n of a channel, 0 = oldest. Uploads made by upload() get the numbers after videos_per_channel.
+    def video_count(self, channel):
+        return self.videos_per_channel + self.new_videos[channel]
+
+    def video_id(self, channel, n):
+        return self.make_id("", 11, "video", channel, n)
+
+    def comments_disabled(self, channel, n):
+        return self.number("disabled", channel, n, high=9999) < self.comments_disabled_rate * 10000
+
+    def comment_count(self, channel, n):
+        if self.comments_disabled(channel, n):
+            return 0
+        return self.number("comments", channel, n, low=self.comments_per_video // 2, high=self.comments_per_video * 3 // 2)
+
+    def reply_count(self, comment_n):
+        return self.replies_per_comment if comment_n % 10 == 0 else 0
+
+    def comment_id(self, channel, n, comment_n):
+        return self.make_id("Ug", 24, "comment", channel, n, comment_n)
+
+    def comment_text(self, channel, n, comment_n):
+        if self.number("duplicate", channel, n, comment_n, high=9999) < self.duplicate_comment_rate * 10000:
+            return common_comment_texts[self.number("common", channel, n, comment_n, high=len(common_comment_texts) - 1)]
+        return f"Comment {comment_n} on video {n} \N{THUMBS UP SIGN}\nsecond line"
+
+    def comment_snippet(self, channel, n, comment_n, video_id):
+        return dict(channelId=self.channel_ids[channel], videoId=video_id,
+                    textOriginal=self.comment_text(channel, n, comment_n),
+                    authorDisplayName=f"@viewer{self.number('author', channel, n, comment_n, high=self.authors)}",
+                    publishedAt=self.timestamp(self.video_count(channel) - n - 1 - comment_n / 1000))
+
+    def reply_resource(self, channel, n, comment_n, reply_n):
+        parent_id = self.comment_id(channel, n, comment_n)
+        return dict(id=f"{parent_id}.{self.make_id('', 22, 'reply', channel, n, comment_n, reply_n)}",
+                    snippet=dict(textOriginal=f"Reply {reply_n}", parentId=parent_id,
+                                 authorDisplayName=f"@viewer{self.number('author', channel, n, comment_n, reply_n, high=self.authors)}",
+                                 publishedAt=self.timestamp(self.video_count(channel) - n - 1 - comment_n / 1000 - reply_n / 100000)))
+
+    #------------------------------------------------------------------------------------------------------------------#
+
+    def list_channels(self, params):
+        items = []
+        for channel_id in params["id"].split(","):
+            if channel_id not in self.channel_index:
+                continue
+            channel = self.channel_index[channel_id]
+            items.append(dict(id=channel_id,
+                              snippet=dict(title=f"Simulated Channel {channel}", description=f"Synthetic channel number {channel}"),
+                              statistics=dict(subscriberCount=str(self.number("subscribers", channel, high=10**7)),
+                                              viewCount=str(self.number("views", channel, high=10**9) + self.view_boost),
+                                              videoCount=str(self.video_count(channel))),
+                              contentDetails=dict(relatedPlaylists=dict(uploads="UU" + channel_id[2:]))))
+        return dict(kind="youtube#channelListResponse", items=items)
+
+    # Uploads playlist, newest video first
+    def list_playlist_items(self, params):
+        channel = self.channel_index["UC" + params["playlistId"][2:]]
+        offset = int(params.get("pageToken", "0"))
+        limit = int(params.get("maxResults", 5))
+        count = self.video_count(channel)
+        numbers = range(count - 1 - offset, max(count - 1 - offset - limit, -1), -1)
+        response = dict(kind="youtube#playlistItemListResponse",
+                        items=[dict(contentDetails=dict(videoId=self.video_id(channel, n), videoPublishedAt=self.timestamp(count - n)))
+                               for n in numbers],
+                        pageInfo=dict(totalResults=count, resultsPerPage=limit))
+        if offset + limit < count:
+            response["nextPageToken"] = str(offset + limit)
+        return response
+
+    def list_videos(self, params):
+        items = []
+        for video_id in params["id"].split(","):
+            if video_id not in self.video_lookup:
+                continue # Deleted or private videos are missing from the response, like on YouTube
+            channel, n = self.video_lookup[video_id]
+            statistics = dict(viewCount=str(self.number("views", channel, n, high=10**6) + self.view_boost),
+                              likeCount=str(self.number("likes", channel, n, high=10**4)),
+                              favoriteCount="0")
+            if not self.comments_disabled(channel, n):
+                replies = sum(self.reply_count(comment_n) for comment_n in range(self.comment_count(channel, n)))
+                statistics["commentCount"] = str(self.comment_count(channel, n) + replies)
+            items.append(dict(id=video_id,
+                              snippet=dict(channelId=self.channel_ids[channel], channelTitle=f"Simulated Channel {channel}",
+                                           title=f"Video {n} of channel {channel}", description="Synthetic video\n" * 3,
+                                           publishedAt=self.timestamp(self.video_count(channel) - n),
+                                           thumbnails=dict(default=dict(url=f"https://i.ytimg.com/vi/{video_id}/default.jpg"))),
+                              statistics=statistics,
+                              contentDetails=dict(duration=f"PT{self.number('minutes', channel, n, high=59)}M{self.number('seconds', channel, n, high=59)}S",
+                                                  caption="false")))
+        return dict(kind="youtube#videoListResponse", items=items)
+
+    def list_comment_threads(self, params):
+        channel, n = self.video_lookup[params["videoId"]]
+        if self.comments_disabled(channel, n):
+            raise self.error(403, "commentsDisabled", "The video identified by the videoId parameter has disabled comments.")
+        offset = int(params.get("pageToken", "0"))
+        limit = int(params.get("maxResults", 20))
+        count = self.comment_count(channel, n)
+        items = []
+        for comment_n in range(offset, min(offset + limit, count)):
+            thread = dict(id=self.comment_id(channel, n, comment_n),
+                          snippet=dict(channelId=self.channel_ids[channel], videoId=params["videoId"],
+                                       totalReplyCount=self.reply_count(comment_n),
+                                       topLevelComment=dict(id=self.comment_id(channel, n, comment_n),
+                                                            snippet=self.comment_snippet(channel, n, comment_n, params["videoId"]))))
+            if self.reply_count(comment_n):
+                with self.lock:
+                    self.reply_parents[thread["id"]] = (channel, n, comment_n)
+            if "replies" in params["part"] and self.reply_count(comment_n):
+                thread["replies"] = dict(comments=[self.reply_resource(channel, n, comment_n, reply_n)
+                                                   for reply_n in range(min(5, self.reply_count(comment_n)))])
+            items.append(thread)
+        response = dict(kind="youtube#commentThreadListResponse", items=items)
+        if offset + limit < count:
+            response["nextPageToken"] = str(offset + limit)
+        return response
+
+    def list_comments(self, params):
+        if params["parentId"] not in self.reply_parents:
+            raise self.error(404, "commentNotFound", "The comment identified by the parentId parameter could not be found.")
+        channel, n, comment_n = self.reply_parents[params["parentId"]]
+        offset = int(params.get("pageToken", "0"))
+        limit = int(params.get("maxResults", 20))
+        count = self.reply_count(comment_n)
+        response = dict(kind="youtube#commentListResponse",
+                        items=[self.reply_resource(channel, n, comment_n, reply_n) for reply_n in range(offset, min(offset + limit, count))])
+        if offset + limit < count:
+            response["nextPageToken"] = str(offset + limit)
+        return response
+
+    handlers = {"channels": list_channels, "playlistItems": list_playlist_items, "videos": list_videos,
+                "commentThreads": list_comment_threads, "comments": list_comments}
+
+    #------------------------------------------------------------------------------------------------------------------#
+
+    # An HttpError with the same JSON error body the real API sends
+    def error(self, status, reason, message=None):
+        content = json.dumps({"error": {"code": status, "message": message or reason,
+                                        "errors": [{"message": message or reason, "domain": "youtube", "reason": reason}]}})
+        return HttpError(httplib2.Response({"status": status}), content.encode(), uri="https://youtube.googleapis.com/youtube/v3")
+
+    def execute(self, request):
+        if self.latency:
+            time.sleep(self.latency * (1 + 0.2 * self.random.random()))
+
+        with self.lock:
+            self.calls[request.resource] += 1
+            if self.daily_quota is not None and self.quota_used + quota_costs[request.resource] > self.daily_quota:
+                self.errors["quotaExceeded"] += 1
+                raise self.error(403, "quotaExceeded", "The request cannot be completed because you have exceeded your quota.")
+            self.quota_used += quota_costs[request.resource]
+            injected = self.random.choice(injected_errors) if self.random.random() < self.error_rate else None
+        if injected:
+            self.errors[injected[1]] += 1
+            raise self.error(*injected)
+
+        response = self.handlers[request.resource](self, request.params)
+        content = json.dumps(response, sort_keys=True)
+        response["etag"] = hashlib.md5(content.encode()).hexdigest()
+        if request.headers.get("If-None-Match") == response["etag"]:
+            raise HttpError(httplib2.Response({"status": 304}), b"", uri=request.uri)
+        return request.postproc(httplib2.Response({"status": 200}), json.dumps(response).encode())
+
+    def stats(self):
+        return dict(calls=sum(self.calls.values()), quota_used=self.quota_used, errors=sum(self.errors.values()),
+                    **{f"calls_{resource}": count for resource, count in sorted(self.calls.items())})
+
+#======================================================== THE END  =======================================================================================#